@@ -0,0 +1,38 @@
+"""
+app/api/conditional.py — ETag helpers for conditional GETs.
+
+The React client re-fetches entity details as the user navigates. If the
+client already holds the current version (its If-None-Match matches our
+ETag) we answer 304 Not Modified with no body, skipping serialization.
+"""
+
+from fastapi import Request, Response, status
+
+# Private: responses depend on the caller's token. Short max-age so the
+# browser revalidates often but can skip requests during rapid navigation.
+DETAIL_CACHE_CONTROL = "private, max-age=10"
+
+
+def weak_etag(*parts) -> str:
+    """Build a weak ETag such as W/"42-1718000000" from the given version parts."""
+    return 'W/"' + "-".join(str(p) for p in parts) + '"'
+
+
+def not_modified(request: Request, etag: str) -> Response | None:
+    """Return a 304 response if the request's If-None-Match matches etag, else None."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return None
+    candidates = {tag.strip() for tag in if_none_match.split(",")}
+    if etag in candidates or "*" in candidates:
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag, "Cache-Control": DETAIL_CACHE_CONTROL},
+        )
+    return None
+
+
+def set_cache_headers(response: Response, etag: str) -> None:
+    """Attach the ETag and Cache-Control headers to a full (200) response."""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = DETAIL_CACHE_CONTROL
@@ -0,0 +1,65 @@
+"""
+app/api/limits.py — Request body size limit for expensive endpoints.
+
+Pydantic parses the whole JSON body before a route runs, so without a cap a
+client could POST a 100 MB chat history and we'd pay to parse it (and then to
+send it to the LLM). This middleware rejects oversized bodies up front, and
+REQUEST_MODEL_CONFIG caps what Pydantic will accept once it does parse.
+
+Written as a plain ASGI middleware (not @app.middleware("http")) so it doesn't
+wrap and re-buffer the streamed SSE responses from the agent route.
+"""
+
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from pydantic import ConfigDict
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+# Shared model_config for request bodies: immutable, unknown keys rejected (so
+# validation never keeps an extras dict around), and no single string longer
+# than 32k characters.
+REQUEST_MODEL_CONFIG = ConfigDict(extra="forbid", frozen=True, str_max_length=32_000)
+
+
+class LimitUploadSize:
+    """Reject request bodies larger than max_upload_size on paths under path_prefix."""
+
+    def __init__(self, app: ASGIApp, max_upload_size: int, path_prefix: str = "/"):
+        self.app = app
+        self.max_upload_size = max_upload_size
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        # Fast path: trust a declared Content-Length and reject without reading
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if not value.isdigit() or int(value) > self.max_upload_size:
+                    response = JSONResponse(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        content={"detail": "Request body too large."},
+                    )
+                    await response(scope, receive, send)
+                    return
+                break
+
+        # Chunked bodies have no Content-Length — count bytes as they arrive
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_upload_size:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail="Request body too large.",
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
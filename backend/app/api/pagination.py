@@ -0,0 +1,46 @@
+"""
+app/api/pagination.py — Opaque cursors for keyset ("seek") pagination.
+
+Keyset pagination remembers the sort key of the last row on a page and asks
+for rows strictly after it, e.g.
+    WHERE (edge_magnitude, id) < (:last_mag, :last_id)
+    ORDER BY edge_magnitude DESC, id DESC
+Unlike OFFSET, Postgres can seek straight to that position in the index, so
+page 1000 is as cheap as page 1.
+
+The cursor handed to clients is just the (sort_key, id) pair, JSON-encoded
+and base64'd so they treat it as opaque.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(sort_key, row_id: int) -> str:
+    """Pack the last row's (sort_key, id) into an opaque URL-safe string."""
+    if isinstance(sort_key, datetime):
+        sort_key = sort_key.isoformat()
+    raw = json.dumps([sort_key, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str, sort_key_type: type = float) -> tuple:
+    """
+    Unpack a cursor produced by encode_cursor back into (sort_key, id).
+    Raises 400 if the client sent something we didn't issue.
+    """
+    try:
+        sort_key, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if sort_key_type is datetime:
+            sort_key = datetime.fromisoformat(sort_key)
+        else:
+            sort_key = sort_key_type(sort_key)
+        return sort_key, int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor.",
+        )
@@ -6,55 +6,124 @@ calling Claude or OpenAI underneath. It has access to tools for querying
 markets, edges, and news embeddings (RAG).
 
 Responses are streamed back to the React frontend using Server-Sent Events (SSE).
+On FastAPI 0.135+ the SSE framing is done by FastAPI's native EventSourceResponse
+(JSON encoding happens in pydantic-core, keep-alive pings are sent automatically).
+Older FastAPI versions fall back to a hand-framed StreamingResponse.
 """
 
+from collections.abc import AsyncGenerator
+from functools import lru_cache
+from typing import Annotated
+
 from fastapi import APIRouter, Depends
 from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.limits import REQUEST_MODEL_CONFIG
 from app.auth.middleware import get_current_user_id
 from app.db.session import get_db
-from app.services.llm_service import LLMService
+from app.services.llm_service import LLMService, get_llm
 
 router = APIRouter()
 
 
 class ChatMessage(BaseModel):
+    model_config = REQUEST_MODEL_CONFIG
+
     role: str       # "user" or "assistant"
     content: str
 
 
 class ChatRequest(BaseModel):
-    messages: list[ChatMessage]
+    model_config = REQUEST_MODEL_CONFIG
+
+    messages: Annotated[list[ChatMessage], Field(min_length=1, max_length=100)]
     session_id: str | None = None   # For future conversation memory
 
 
-@router.post("/chat")
-async def chat(
-    request: ChatRequest,
-    user_id: str = Depends(get_current_user_id),
-    db: AsyncSession = Depends(get_db),
-):
+class ChatChunk(BaseModel):
+    """One streamed piece of the agent's reply, sent as the SSE `data` field."""
+    chunk: str
+
+
+# Sentinel sent as the final SSE event so the client knows the stream is complete
+STREAM_DONE = "[DONE]"
+
+
+@lru_cache(maxsize=1)
+def _native_sse():
     """
-    Send a message to the AI agent and get a streamed response.
+    Return (EventSourceResponse, ServerSentEvent) from fastapi.sse, or None
+    if the installed FastAPI predates native SSE support (< 0.135).
+    """
+    try:
+        from fastapi.sse import EventSourceResponse, ServerSentEvent
+    except ImportError:
+        return None
+    return EventSourceResponse, ServerSentEvent
 
-    The agent can answer questions about open markets, explain detected edges,
-    surface relevant news, and help build trading strategies.
 
+async def _chat_chunks(request: ChatRequest, llm: LLMService) -> AsyncGenerator[ChatChunk, None]:
+    """
+    Yield the agent's reply as ChatChunk models as they arrive from the LLM.
     TODO: Wire up LLMService with tools (market queries, RAG, edge data).
-    TODO: Stream the response back as SSE chunks.
     """
-    llm = LLMService()
-
-    async def generate():
-        # Placeholder: yield chunks as they arrive from the LLM
-        # TODO: Replace with actual streaming from LLMService
-        yield "data: {\"chunk\": \"Agent not yet implemented.\"}\n\n"
-        yield "data: [DONE]\n\n"
-
-    return StreamingResponse(
-        generate(),
-        media_type="text/event-stream",
-        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
-    )
+    messages = [m.model_dump() for m in request.messages]
+    stream = await llm.stream_chat(messages)
+    # Drive and close the upstream generator on this (the request) task, so a
+    # client disconnect cancels it here instead of leaving it to GC finalization.
+    try:
+        async for text in stream:
+            yield ChatChunk(chunk=text)
+    finally:
+        await stream.aclose()
+
+
+if _native_sse() is not None:
+    EventSourceResponse, ServerSentEvent = _native_sse()
+
+    # EventSourceResponse sets text/event-stream, Cache-Control: no-cache and
+    # X-Accel-Buffering: no, and emits a comment ping every 15s while idle.
+    @router.post("/chat", response_class=EventSourceResponse)
+    async def chat(
+        request: ChatRequest,
+        user_id: str = Depends(get_current_user_id),
+        db: AsyncSession = Depends(get_db),
+        llm: LLMService = Depends(get_llm),
+    ):
+        """
+        Send a message to the AI agent and get a streamed response.
+
+        The agent can answer questions about open markets, explain detected edges,
+        surface relevant news, and help build trading strategies.
+        """
+        async for chunk in _chat_chunks(request, llm):
+            yield ServerSentEvent(data=chunk)
+        yield ServerSentEvent(raw_data=STREAM_DONE)
+
+else:
+
+    @router.post("/chat")
+    async def chat(
+        request: ChatRequest,
+        user_id: str = Depends(get_current_user_id),
+        db: AsyncSession = Depends(get_db),
+        llm: LLMService = Depends(get_llm),
+    ):
+        """
+        Send a message to the AI agent and get a streamed response.
+
+        The agent can answer questions about open markets, explain detected edges,
+        surface relevant news, and help build trading strategies.
+        """
+        async def generate():
+            async for chunk in _chat_chunks(request, llm):
+                yield f"data: {chunk.model_dump_json()}\n\n"
+            yield f"data: {STREAM_DONE}\n\n"
+
+        return StreamingResponse(
+            generate(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
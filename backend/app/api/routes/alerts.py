@@ -9,6 +9,7 @@ from fastapi import APIRouter, Depends
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.limits import REQUEST_MODEL_CONFIG
 from app.auth.middleware import get_current_user_id
 from app.db.session import get_db
 
@@ -16,6 +17,8 @@ router = APIRouter()
 
 
 class AlertPreferencesUpdate(BaseModel):
+    model_config = REQUEST_MODEL_CONFIG
+
     alert_threshold: float | None = None    # Minimum edge magnitude (0.0–1.0)
     alerts_enabled: bool | None = None
     alert_platforms: list[str] | None = None  # ["kalshi", "polymarket"]
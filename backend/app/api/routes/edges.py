@@ -5,40 +5,116 @@ An edge is a market where our model's probability estimate significantly
 diverges from the market's implied probability, suggesting mispriced odds.
 """
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import func, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
+from app.api.conditional import not_modified, set_cache_headers, weak_etag
+from app.api.pagination import decode_cursor, encode_cursor
+from app.api.routes.markets import market_to_dict
 from app.auth.middleware import verify_token
-from app.db.session import get_db
+from app.db.session import get_readonly_db
+from app.models.edge import Edge
+from app.models.market import Market, MarketPlatform
 
 router = APIRouter()
 
+# Built once at import and filtered per request, like the markets route, so
+# SQLAlchemy reuses the compiled SQL for each filter combination.
+# selectinload fetches the related markets in a second "WHERE id IN (...)"
+# query. A joinedload plus LIMIT can make SQLAlchemy wrap the page in a
+# subquery, which stops Postgres from pushing the LIMIT down.
+_EDGES = select(Edge).options(selectinload(Edge.market))
+# Bare count(*), as in the markets route (index-only scan, no subquery)
+_EDGES_COUNT = select(func.count()).select_from(Edge)
+
+
+def edge_to_dict(edge: Edge) -> dict:
+    return {
+        "id": edge.id,
+        "market_id": edge.market_id,
+        "market_probability": edge.market_probability,
+        "model_probability": edge.model_probability,
+        "edge_magnitude": edge.edge_magnitude,
+        "direction": edge.direction,
+        "alert_sent": edge.alert_sent,
+        "detected_at": edge.detected_at,
+        "market": market_to_dict(edge.market),
+    }
+
 
 @router.get("/")
 async def list_edges(
     min_magnitude: float = Query(0.05, description="Minimum edge magnitude (e.g. 0.05 = 5%)"),
-    platform: str | None = None,
+    platform: MarketPlatform | None = None,
     direction: str | None = None,   # "YES" or "NO"
-    limit: int = 50,
-    offset: int = 0,
-    db: AsyncSession = Depends(get_db),
+    limit: int = Query(50, ge=1, le=200),
+    after: str | None = Query(None, description="Cursor from the previous page's next_cursor"),
+    offset: int = Query(0, ge=0, description="Legacy pagination; ignored when 'after' is set"),
+    db: AsyncSession = Depends(get_readonly_db),
     _user: dict = Depends(verify_token),
 ):
     """
-    Return detected edges above the given magnitude threshold.
-    TODO: SELECT from edges JOIN markets WHERE edge_magnitude >= min_magnitude.
+    Return detected edges above the given magnitude threshold, largest first.
+
+    Paginated by keyset: pass the returned next_cursor as 'after' to get the
+    following page. next_cursor is null on the last page.
     """
-    return {"edges": [], "total": 0}
+    filters = [Edge.edge_magnitude >= min_magnitude]
+    if direction is not None:
+        filters.append(Edge.direction == direction.upper())
+
+    stmt = _EDGES
+    count_stmt = _EDGES_COUNT
+    if platform is not None:
+        # Only join markets when the filter actually needs it
+        stmt = stmt.join(Market, Edge.market_id == Market.id)
+        count_stmt = count_stmt.join(Market, Edge.market_id == Market.id)
+        filters.append(Market.platform == platform)
+    stmt = stmt.where(*filters)
+    count_stmt = count_stmt.where(*filters)
+
+    if after is not None:
+        last_magnitude, last_id = decode_cursor(after, float)
+        stmt = stmt.where(tuple_(Edge.edge_magnitude, Edge.id) < (last_magnitude, last_id))
+    elif offset:
+        stmt = stmt.offset(offset)
+
+    # Fetch one extra row to learn whether another page exists
+    stmt = stmt.order_by(Edge.edge_magnitude.desc(), Edge.id.desc()).limit(limit + 1)
+    # An AsyncSession can't run two statements at once, so these go in sequence
+    edges = list((await db.execute(stmt)).scalars())
+    total = (await db.execute(count_stmt)).scalar_one()
+
+    next_cursor = None
+    if len(edges) > limit:
+        edges = edges[:limit]
+        next_cursor = encode_cursor(edges[-1].edge_magnitude, edges[-1].id)
+
+    return {"edges": [edge_to_dict(e) for e in edges], "total": total, "next_cursor": next_cursor}
 
 
 @router.get("/{edge_id}")
 async def get_edge(
     edge_id: int,
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_readonly_db),
     _user: dict = Depends(verify_token),
 ):
     """
     Return detailed data for a single edge detection event.
-    TODO: Implement.
+
+    Sends a weak ETag derived from the edge's alert state and its market's
+    updated_at; a matching If-None-Match gets a bodyless 304.
     """
-    return {"edge_id": edge_id, "detail": "TODO"}
+    edge = (await db.execute(_EDGES.where(Edge.id == edge_id))).scalar_one_or_none()
+    if edge is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Edge not found.")
+
+    etag = weak_etag(edge.id, int(edge.alert_sent), int(edge.market.updated_at.timestamp()))
+    if (cached := not_modified(request, etag)) is not None:
+        return cached
+    set_cache_headers(response, etag)
+    return edge_to_dict(edge)
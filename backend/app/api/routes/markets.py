@@ -4,39 +4,116 @@ app/api/routes/markets.py — Endpoints for browsing live prediction market data
 All endpoints require a valid Auth0 JWT (via the verify_token dependency).
 """
 
-from fastapi import APIRouter, Depends
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import func, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.conditional import not_modified, set_cache_headers, weak_etag
+from app.api.pagination import decode_cursor, encode_cursor
 from app.auth.middleware import verify_token
-from app.db.session import get_db
+from app.db.session import get_readonly_db
+from app.models.market import Market, MarketPlatform
 
 router = APIRouter()
 
+# Built once at import; requests chain filters on, and SQLAlchemy reuses the
+# compiled SQL for each filter combination. Filters are added only when set
+# (not "col = :p OR :p IS NULL"), so Postgres can still use the indexes.
+_OPEN_MARKETS = select(Market).where(Market.is_open.is_(True))
+# Bare count(*) with no ORDER BY or columns, so Postgres can answer it with
+# an index-only scan instead of counting a wrapped subquery.
+_OPEN_MARKETS_COUNT = select(func.count()).select_from(Market).where(Market.is_open.is_(True))
+
+
+def market_to_dict(market: Market) -> dict:
+    return {
+        "id": market.id,
+        "platform": market.platform.value,
+        "external_id": market.external_id,
+        "title": market.title,
+        "category": market.category,
+        "close_time": market.close_time,
+        "yes_price": market.yes_price,
+        "volume": market.volume,
+        "is_open": market.is_open,
+        "created_at": market.created_at,
+        "updated_at": market.updated_at,
+    }
+
 
 @router.get("/")
 async def list_markets(
-    platform: str | None = None,           # Filter by "kalshi" or "polymarket"
-    category: str | None = None,           # Filter by category tag
-    limit: int = 50,
-    offset: int = 0,
-    db: AsyncSession = Depends(get_db),
-    _user: dict = Depends(verify_token),   # Enforces authentication
+    platform: MarketPlatform | None = None,  # Filter by "kalshi" or "polymarket"
+    category: str | None = None,             # Filter by category tag
+    limit: int = Query(50, ge=1, le=200),
+    after: str | None = Query(None, description="Cursor from the previous page's next_cursor"),
+    offset: int = Query(0, ge=0, description="Legacy pagination; ignored when 'after' is set"),
+    db: AsyncSession = Depends(get_readonly_db),
+    _user: dict = Depends(verify_token),     # Enforces authentication
 ):
     """
-    Return paginated list of open markets, optionally filtered by platform/category.
-    TODO: Implement SELECT query against the markets table.
+    Return paginated list of open markets, newest first, optionally filtered by platform/category.
+
+    Paginated by keyset: pass the returned next_cursor as 'after' to get the
+    following page. next_cursor is null on the last page.
     """
-    return {"markets": [], "total": 0, "limit": limit, "offset": offset}
+    filters = []
+    if platform is not None:
+        filters.append(Market.platform == platform)
+    if category is not None:
+        filters.append(Market.category == category)
+
+    stmt = _OPEN_MARKETS.where(*filters)
+    count_stmt = _OPEN_MARKETS_COUNT.where(*filters)
+
+    if after is not None:
+        last_created_at, last_id = decode_cursor(after, datetime)
+        stmt = stmt.where(tuple_(Market.created_at, Market.id) < (last_created_at, last_id))
+    elif offset:
+        stmt = stmt.offset(offset)
+
+    # Fetch one extra row to learn whether another page exists
+    stmt = stmt.order_by(Market.created_at.desc(), Market.id.desc()).limit(limit + 1)
+    # An AsyncSession can't run two statements at once, so these go in sequence
+    markets = list((await db.execute(stmt)).scalars())
+    total = (await db.execute(count_stmt)).scalar_one()
+
+    next_cursor = None
+    if len(markets) > limit:
+        markets = markets[:limit]
+        next_cursor = encode_cursor(markets[-1].created_at, markets[-1].id)
+
+    return {
+        "markets": [market_to_dict(m) for m in markets],
+        "total": total,
+        "limit": limit,
+        "next_cursor": next_cursor,
+    }
 
 
 @router.get("/{market_id}")
 async def get_market(
     market_id: int,
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_readonly_db),
     _user: dict = Depends(verify_token),
 ):
     """
     Return detailed data for a single market by internal ID.
+
+    Sends a weak ETag derived from updated_at; a matching If-None-Match gets
+    a bodyless 304.
     TODO: Implement SELECT with JOIN to edges table for recent edge history.
     """
-    return {"market_id": market_id, "detail": "TODO"}
+    market = await db.get(Market, market_id)
+    if market is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Market not found.")
+
+    etag = weak_etag(market.id, int(market.updated_at.timestamp()))
+    if (cached := not_modified(request, etag)) is not None:
+        return cached
+    set_cache_headers(response, etag)
+    return market_to_dict(market)
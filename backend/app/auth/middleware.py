@@ -22,10 +22,16 @@ HOW AUTH0 JWT VALIDATION WORKS (plain English):
 6. If anything fails, we return a 401 Unauthorized response immediately.
 """
 
+import asyncio
+import hashlib
+import time
+
 import httpx
-from jose import JWTError, jwt
-from jose.exceptions import ExpiredSignatureError
-from fastapi import Depends, HTTPException, Security, status
+from cachetools import TLRUCache, TTLCache
+from jose import JWTError, jwk, jwt
+from jose.backends.base import Key
+from jose.exceptions import ExpiredSignatureError, JWKError
+from fastapi import Depends, HTTPException, Request, Security, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
 from app.config import settings
@@ -34,28 +40,88 @@ from app.config import settings
 bearer_scheme = HTTPBearer()
 
 # Cache the JWKS (public keys) so we don't fetch them on every request.
-# In production, add a proper TTL cache (e.g. with cachetools).
-_jwks_cache: dict | None = None
-
-
-async def get_jwks() -> dict:
+# Holds a single entry: {kid: public key object}. Keys are indexed and parsed
+# into RSA key objects once at fetch time, so verification neither scans the
+# JWKS nor re-parses the JWK on every call. The TTL picks up Auth0 key rotation.
+_JWKS_CACHE_KEY = "keys"
+_jwks_cache: TTLCache = TTLCache(maxsize=1, ttl=settings.jwks_cache_ttl)
+
+# An unknown "kid" forces a refetch (Auth0 may have rotated keys), but never
+# more often than this — otherwise junk tokens could hammer Auth0 through us.
+_JWKS_MIN_REFRESH_SECS = 30
+_jwks_fetched_at = 0.0
+
+# Auth0 RS256 access tokens are ~1-2 KB; anything far larger is not a real token.
+MAX_TOKEN_LENGTH = 8192
+
+
+def _token_ttu(_key: bytes, payload: dict, now: float) -> float:
+    """Expire a cached payload after jwt_cache_ttl, or at its 'exp' if sooner."""
+    return now + min(settings.jwt_cache_ttl, payload.get("exp", now) - now)
+
+
+# Verified JWT payloads keyed by SHA-256 of the raw token. RS256 verification
+# is the most expensive thing on the request path, and the React app reuses
+# the same token across many requests. Wall-clock timer so 'exp' compares directly.
+# No lock needed: reads and writes happen on the event loop without awaiting.
+_token_cache: TLRUCache = TLRUCache(
+    maxsize=settings.jwt_cache_maxsize, ttu=_token_ttu, timer=time.time
+)
+
+
+async def _fetch_jwks(client: httpx.AsyncClient | None) -> dict[str, Key]:
+    """Download the JWKS and build a public key object for each 'kid'."""
+    if client is None:
+        async with httpx.AsyncClient() as fresh_client:
+            response = await fresh_client.get(settings.auth0_jwks_uri)
+    else:
+        response = await client.get(settings.auth0_jwks_uri)
+    response.raise_for_status()
+
+    keys = {}
+    for key_data in response.json().get("keys", []):
+        if "kid" not in key_data:
+            continue
+        try:
+            keys[key_data["kid"]] = jwk.construct(key_data, algorithm=key_data.get("alg", "RS256"))
+        except JWKError:
+            continue  # Not a key type we can verify with — ignore it
+    return keys
+
+
+async def get_jwks(client: httpx.AsyncClient | None = None, refresh: bool = False) -> dict[str, Key]:
     """
-    Fetch Auth0's public signing keys.
+    Fetch Auth0's public signing keys, indexed by key ID ("kid").
 
     Auth0 uses RS256: they sign JWTs with a private key and publish the
     matching public key at a well-known URL. We use the public key to verify
     that a token was actually signed by Auth0 and wasn't tampered with.
+
+    Pass the app's shared httpx client (app.state.http) to reuse its
+    connection pool; without one a short-lived client is created.
     """
-    global _jwks_cache
-    if _jwks_cache is None:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(settings.auth0_jwks_uri)
-            response.raise_for_status()
-            _jwks_cache = response.json()
-    return _jwks_cache
+    global _jwks_fetched_at
+    keys = None if refresh else _jwks_cache.get(_JWKS_CACHE_KEY)
+    if keys is None:
+        keys = await _fetch_jwks(client)
+        _jwks_cache[_JWKS_CACHE_KEY] = keys
+        _jwks_fetched_at = time.monotonic()
+    return keys
+
+
+async def get_signing_key(kid: str | None, client: httpx.AsyncClient | None = None) -> Key | None:
+    """
+    Return the public key matching a token's "kid" header, or None if Auth0 doesn't publish it.
+    On a miss, refetch the JWKS once in case the keys were rotated.
+    """
+    keys = await get_jwks(client)
+    if kid not in keys and time.monotonic() - _jwks_fetched_at >= _JWKS_MIN_REFRESH_SECS:
+        keys = await get_jwks(client, refresh=True)
+    return keys.get(kid)
 
 
 async def verify_token(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Security(bearer_scheme),
 ) -> dict:
     """
@@ -67,6 +133,11 @@ async def verify_token(
             user_id = user["sub"]  # Auth0 user ID, e.g. "auth0|abc123"
 
     Raises 401 if the token is missing, expired, or invalid.
+
+    FastAPI caches a dependency's result per request, so routes that depend on
+    both this and get_current_user_id still verify the token only once. Keep it
+    free of side effects (e.g. "ensure user row exists") — put those in a
+    separate dependency that takes the payload and the DB session.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -76,22 +147,44 @@ async def verify_token(
 
     token = credentials.credentials
 
+    # Cheap shape check (header.payload.signature) before any decoding or
+    # JWKS lookup, so junk or oversized bearer strings cost us nothing.
+    if not token or len(token) > MAX_TOKEN_LENGTH or token.count(".") != 2:
+        raise credentials_exception
+
     try:
-        # Fetch Auth0's public keys
-        jwks = await get_jwks()
+        # Find the public key this token claims to be signed with.
+        # Reading the header is a cheap base64 decode — no signature check yet.
+        kid = jwt.get_unverified_header(token).get("kid")
+        signing_key = await get_signing_key(kid, getattr(request.app.state, "http", None))
+        if signing_key is None:
+            raise credentials_exception
+
+        # Serve recently verified tokens from the cache. Only reached while the
+        # signing key is still published, so a rotated-out key isn't trusted.
+        cache_key = None
+        if settings.jwt_cache_enabled:
+            cache_key = hashlib.sha256(token.encode()).digest()
+            cached = _token_cache.get(cache_key)
+            if cached is not None and cached.get("exp", 0) > time.time():
+                return cached
 
         # Decode and verify the JWT.
         # python-jose automatically:
-        #   - Picks the right key from JWKS using the token's "kid" header
-        #   - Verifies the RSA signature
+        #   - Verifies the RSA signature against the matching key
         #   - Checks expiry, audience, and issuer claims
-        payload = jwt.decode(
+        # RSA verification is CPU-bound, so it runs in a worker thread rather
+        # than blocking the event loop (and every SSE stream on it).
+        payload = await asyncio.to_thread(
+            jwt.decode,
             token,
-            jwks,
+            signing_key,
             algorithms=settings.auth0_algorithms,
             audience=settings.auth0_audience,
             issuer=settings.auth0_issuer,
         )
+        if cache_key is not None:
+            _token_cache[cache_key] = payload
         return payload  # Contains "sub" (user ID), "email", scopes, etc.
 
     except ExpiredSignatureError:
@@ -6,6 +6,7 @@ This is important for an API that handles many concurrent requests.
 """
 
 from collections.abc import AsyncGenerator
+from uuid import uuid4
 
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
@@ -17,9 +18,31 @@ from app.config import settings
 # The engine manages the underlying connection pool to PostgreSQL.
 # pool_pre_ping=True checks that connections are alive before using them
 # (prevents "connection was closed" errors after idle periods).
+# The pool is sized explicitly (see Settings.db_pool_*) — the SQLAlchemy
+# defaults are too small for many concurrent requests.
+_connect_args: dict = {}
+if settings.db_pgbouncer:
+    # PgBouncer transaction mode hands each transaction a different server
+    # connection, so cached prepared statements can't be reused: turn off
+    # both asyncpg's cache and SQLAlchemy's, and give every statement a
+    # unique name so two clients never collide ("prepared statement already
+    # exists"). Server settings such as jit can't be sent as startup
+    # parameters through PgBouncer — set them on the role/database instead
+    # (ALTER ROLE miscalibrated SET jit = off).
+    _connect_args = {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+    }
+
 engine = create_async_engine(
     settings.database_url,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
     pool_pre_ping=True,
+    connect_args=_connect_args,
     echo=(settings.environment == "development"),  # Log SQL in dev mode
 )
 
@@ -35,6 +58,19 @@ AsyncSessionLocal = async_sessionmaker(
 )
 
 
+# Read-only endpoints run in AUTOCOMMIT: no implicit BEGIN / ROLLBACK around
+# each SELECT, so a GET costs one round-trip instead of three. Shares the
+# main engine's connection pool. Never use these sessions for writes.
+readonly_engine = engine.execution_options(isolation_level="AUTOCOMMIT")
+
+ReadOnlySessionLocal = async_sessionmaker(
+    bind=readonly_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False,
+)
+
+
 # ─── Base Model ──────────────────────────────────────────────────────────────
 # All ORM models inherit from this Base. SQLAlchemy uses it to track
 # all mapped tables for migrations and schema generation.
@@ -55,6 +91,19 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
 
     The 'async with' ensures the session is properly closed after each request,
     even if an exception occurs.
+
+    Keep this dependency doing nothing but opening the session: creating an
+    AsyncSession is cheap and doesn't touch the pool — a connection is only
+    checked out on the first execute(), so it never waits behind auth.
     """
     async with AsyncSessionLocal() as session:
         yield session
+
+
+async def get_readonly_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Like get_db, but for routes that only SELECT. The session runs in
+    AUTOCOMMIT isolation, skipping per-request transaction round-trips.
+    """
+    async with ReadOnlySessionLocal() as session:
+        yield session
@@ -12,7 +12,7 @@ Example:
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, Float, ForeignKey, Integer, String, func
+from sqlalchemy import DateTime, Float, ForeignKey, Index, Integer, String, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.session import Base
@@ -44,3 +44,7 @@ class Edge(Base):
     alert_sent: Mapped[bool] = mapped_column(default=False)
 
     detected_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
+# Matches the list endpoint's ORDER BY so keyset pagination is an index seek
+Index("edges_mag_id_idx", Edge.edge_magnitude.desc(), Edge.id.desc())
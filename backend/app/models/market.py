@@ -8,7 +8,7 @@ after they receive raw data from the Kalshi or Polymarket producers.
 import enum
 from datetime import datetime
 
-from sqlalchemy import DateTime, Enum, Float, Integer, String, func
+from sqlalchemy import DateTime, Enum, Float, Index, Integer, String, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.session import Base
@@ -52,3 +52,7 @@ class Market(Base):
     # Timestamps managed automatically by the DB
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+# Matches the list endpoint's ORDER BY so keyset pagination is an index seek
+Index("markets_created_id_idx", Market.created_at.desc(), Market.id.desc())
@@ -11,9 +11,23 @@ Pattern: Program to an interface, not an implementation.
 from abc import ABC, abstractmethod
 from collections.abc import AsyncGenerator
 
+import httpx
+from fastapi import Request
+
 from app.config import settings
 
 
+def _provider_http_client() -> httpx.AsyncClient:
+    """
+    Long-lived HTTP client handed to the provider SDKs, so connections (and
+    their TLS sessions) to the LLM API are kept alive across chat requests.
+    """
+    return httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        timeout=httpx.Timeout(600.0, connect=5.0),  # Long streams need a generous read timeout
+    )
+
+
 # ─── Abstract Interface ───────────────────────────────────────────────────────
 # Any provider must implement this interface. This ensures that
 # the agent logic is completely decoupled from the specific LLM API.
@@ -37,6 +51,10 @@ class BaseLLMProvider(ABC):
         """Return a full completion (non-streaming)."""
         ...
 
+    async def aclose(self) -> None:
+        """Release the provider's HTTP connection pool."""
+        await self.client.close()
+
 
 # ─── Anthropic (Claude) Provider ─────────────────────────────────────────────
 class AnthropicProvider(BaseLLMProvider):
@@ -44,7 +62,10 @@ class AnthropicProvider(BaseLLMProvider):
     def __init__(self):
         # Import here to avoid loading the SDK if we're using OpenAI
         import anthropic
-        self.client = anthropic.AsyncAnthropic(api_key=settings.anthropic_api_key)
+        self.client = anthropic.AsyncAnthropic(
+            api_key=settings.anthropic_api_key,
+            http_client=_provider_http_client(),
+        )
         self.model = "claude-sonnet-4-6"
 
     async def stream_chat(
@@ -58,6 +79,8 @@ class AnthropicProvider(BaseLLMProvider):
         if system_prompt:
             kwargs["system"] = system_prompt
 
+        # The async with closes the upstream HTTP stream on GeneratorExit /
+        # CancelledError (client disconnect), so we stop paying for tokens.
         async with self.client.messages.stream(**kwargs) as stream:
             async for text in stream.text_stream:
                 yield text
@@ -82,7 +105,10 @@ class OpenAIProvider(BaseLLMProvider):
 
     def __init__(self):
         import openai
-        self.client = openai.AsyncOpenAI(api_key=settings.openai_api_key)
+        self.client = openai.AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            http_client=_provider_http_client(),
+        )
         self.model = "gpt-4o"
 
     async def stream_chat(
@@ -99,10 +125,15 @@ class OpenAIProvider(BaseLLMProvider):
         stream = await self.client.chat.completions.create(
             model=self.model, messages=msgs, stream=True
         )
-        async for chunk in stream:
-            delta = chunk.choices[0].delta.content
-            if delta:
-                yield delta
+        try:
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+        finally:
+            # Runs on GeneratorExit / CancelledError too (client disconnect),
+            # tearing down the upstream HTTP stream so token generation stops.
+            await stream.close()
 
     async def complete(
         self,
@@ -124,8 +155,11 @@ class OpenAIProvider(BaseLLMProvider):
 class LLMService:
     """
     Public interface used throughout the app.
-    Instantiate this class wherever you need an LLM — it picks the
-    right provider automatically based on settings.llm_provider.
+    It picks the right provider automatically based on settings.llm_provider.
+
+    One instance is created at startup (app.state.llm) and shared by all
+    requests — routes get it via Depends(get_llm) rather than constructing
+    their own, so the provider's connection pool survives between requests.
     """
 
     def __init__(self):
@@ -142,6 +176,13 @@ class LLMService:
         messages: list[dict],
         system_prompt: str | None = None,
     ) -> AsyncGenerator[str, None]:
+        """
+        Return an async generator of text chunks from the active provider.
+
+        Iterate it on the task that called this (the request task) and close
+        it there — never hand it to asyncio.create_task or an executor, or
+        anyio cancel scopes and contextvars will be bound to the wrong task.
+        """
         return self._provider.stream_chat(messages, system_prompt)
 
     async def complete(
@@ -150,3 +191,12 @@ class LLMService:
         system_prompt: str | None = None,
     ) -> str:
         return await self._provider.complete(messages, system_prompt)
+
+    async def aclose(self) -> None:
+        await self._provider.aclose()
+
+
+# ─── Dependency ──────────────────────────────────────────────────────────────
+def get_llm(request: Request) -> LLMService:
+    """FastAPI dependency that returns the shared LLMService created in lifespan."""
+    return request.app.state.llm
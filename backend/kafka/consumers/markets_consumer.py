@@ -24,18 +24,23 @@ This consumer:
   1. Subscribes to kalshi.markets and polymarket.markets topics
   2. Receives raw JSON market payloads from the producers
   3. Normalizes them into the shared Market schema
-  4. Upserts into the PostgreSQL markets table (insert or update on conflict)
+  4. Bulk-upserts each batch into the PostgreSQL markets table
+     (COPY into a staging table, then insert or update on conflict)
 
 Usage:
     python -m kafka.consumers.markets_consumer
 """
 
-import json
+import asyncio
 import logging
 import os
 import signal
 import sys
+from collections import OrderedDict
+from datetime import datetime
 
+import asyncpg
+import msgspec
 from confluent_kafka import Consumer, KafkaException, KafkaError
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [markets-consumer] %(message)s")
@@ -51,9 +56,73 @@ TOPICS = ["kalshi.markets", "polymarket.markets"]
 # Kafka tracks the group's offset so messages are never processed twice.
 GROUP_ID = "markets-consumer"
 
+# Max messages pulled per consume() call. Fetching in batches amortizes the
+# per-call C↔Python overhead that single-message poll() pays every time.
+BATCH_SIZE = 500
+
+# How long an idle consume() call waits for messages. The shutdown flag is
+# checked between calls, so this bounds how long SIGTERM takes to act on.
+CONSUME_TIMEOUT = 0.5
+
 # Graceful shutdown flag
 running = True
 
+# ─── Change detection ────────────────────────────────────────────────────────
+# Producers re-publish every open market each poll, but most haven't changed.
+# Remember a fingerprint of what we last wrote per market and skip repeats
+# before they reach Postgres. Bounded LRU so memory stays flat.
+LAST_SEEN_MAX = 100_000
+_last_seen: OrderedDict[str, int] = OrderedDict()   # external_id → fingerprint
+
+# ─── Bulk upsert SQL ─────────────────────────────────────────────────────────
+# Each batch is COPY'd into a session-local staging table, then merged into
+# markets with a single INSERT ... ON CONFLICT. COPY streams all rows in one
+# round-trip, which is far cheaper than one INSERT per market.
+# Temp tables skip the WAL; ON COMMIT DELETE ROWS empties it after each batch.
+CREATE_STAGING_SQL = """
+CREATE TEMP TABLE IF NOT EXISTS markets_staging (
+    platform    text,
+    external_id text,
+    title       text,
+    category    text,
+    close_time  timestamptz,
+    yes_price   double precision,
+    volume      double precision,
+    is_open     boolean
+) ON COMMIT DELETE ROWS
+"""
+
+MERGE_STAGING_SQL = """
+INSERT INTO markets (platform, external_id, title, category, close_time, yes_price, volume, is_open)
+SELECT platform::marketplatform, external_id, title, category, close_time, yes_price, volume, is_open
+FROM markets_staging
+ON CONFLICT (external_id) DO UPDATE SET
+    title      = EXCLUDED.title,
+    category   = EXCLUDED.category,
+    close_time = EXCLUDED.close_time,
+    yes_price  = EXCLUDED.yes_price,
+    volume     = EXCLUDED.volume,
+    is_open    = EXCLUDED.is_open,
+    updated_at = now()
+"""
+
+STAGING_COLUMNS = ["platform", "external_id", "title", "category", "close_time", "yes_price", "volume", "is_open"]
+
+# The markets.platform column is a SQLAlchemy Enum, which stores member
+# *names* in Postgres ("KALSHI"), not the lowercase values we normalize to.
+PLATFORM_DB_NAMES = {"kalshi": "KALSHI", "polymarket": "POLYMARKET"}
+
+# Widths of the varchar columns in app/models/market.py. Text is clipped to
+# fit, since one over-long title would otherwise fail the whole batch's merge.
+EXTERNAL_ID_MAX = 255
+TITLE_MAX       = 500
+CATEGORY_MAX    = 100
+
+# The Kafka loop is synchronous; asyncpg calls run on this private event loop
+# over one long-lived connection (the staging table lives on that connection).
+_db_loop = asyncio.new_event_loop()
+_db_conn: asyncpg.Connection | None = None
+
 
 def handle_signal(sig, frame):
     """Catch SIGTERM/SIGINT so we can flush and exit cleanly."""
@@ -78,57 +147,213 @@ def create_consumer() -> Consumer:
     })
 
 
-def normalize_kalshi(raw: dict) -> dict | None:
+# ─── Message schemas ─────────────────────────────────────────────────────────
+# msgspec decodes a message straight into these structs in one C call —
+# parsing, picking out the fields we need, type-checking and filling defaults
+# all at once. Fields not listed here are skipped without being materialized,
+# and structs are slotted objects, so no intermediate dict is built.
+# A payload that doesn't match (e.g. a Kalshi market with no ticker) raises
+# msgspec.ValidationError, which the consumer loop logs and skips.
+
+class KalshiMarket(msgspec.Struct):
     """
-    Transform raw Kalshi API response into the shared Market schema.
-    TODO: Map all relevant Kalshi fields. This is a minimal placeholder.
+    The subset of a Kalshi /markets entry that we store. Kalshi sends null
+    for fields it has no value for yet (e.g. no bids on a new market), so
+    everything but the ticker is optional and defaulted in normalize_kalshi.
     """
-    try:
-        return {
-            "platform": "kalshi",
-            "external_id": raw["ticker"],
-            "title": raw.get("title", ""),
-            "category": raw.get("category", ""),
-            "close_time": raw.get("close_time"),
-            # Kalshi yes price is in cents (0–100), normalize to 0–1
-            "yes_price": (raw.get("yes_bid", 0) + raw.get("yes_ask", 0)) / 200,
-            "volume": raw.get("volume", 0),
-            "is_open": raw.get("status") == "open",
-        }
-    except (KeyError, TypeError) as e:
-        log.warning(f"Failed to normalize Kalshi market: {e}")
-        return None
+    ticker: str
+    title: str | None = None
+    category: str | None = None
+    close_time: str | None = None
+    yes_bid: float | None = None
+    yes_ask: float | None = None
+    volume: float | None = None
+    status: str | None = None
 
 
-def normalize_polymarket(raw: dict) -> dict | None:
+class PolymarketMarket(msgspec.Struct, rename="camel"):
+    """
+    The subset of a Polymarket market that we store. rename="camel" maps
+    condition_id ↔ conditionId etc. Polymarket sends volume as a string
+    ("1234.5") and outcomePrices as a JSON-encoded string ('["0.62", "0.38"]'),
+    so both are converted in normalize_polymarket.
+    """
+    condition_id: str | None = None
+    id: str | int | None = None
+    question: str | None = None
+    title: str | None = None
+    category: str | None = None
+    end_date: str | None = None
+    outcome_prices: str | list[str] | None = None
+    volume: str | float | None = None
+    active: bool | None = None
+
+
+# Decoders are reusable and cheaper than calling msgspec.json.decode(type=...)
+# per message. One per topic.
+DECODERS = {
+    "kalshi.markets": msgspec.json.Decoder(KalshiMarket),
+    "polymarket.markets": msgspec.json.Decoder(PolymarketMarket),
+}
+
+
+def normalize_kalshi(raw: KalshiMarket) -> dict:
+    """
+    Transform raw Kalshi API response into the shared Market schema.
+    TODO: Map all relevant Kalshi fields. This is a minimal placeholder.
+    """
+    return {
+        "platform": "kalshi",
+        "external_id": raw.ticker,
+        "title": raw.title or "",
+        "category": raw.category,
+        "close_time": raw.close_time,
+        # Kalshi yes price is in cents (0–100), normalize to 0–1
+        "yes_price": ((raw.yes_bid or 0) + (raw.yes_ask or 0)) / 200,
+        "volume": raw.volume or 0,
+        "is_open": raw.status == "open",
+    }
+
+
+def normalize_polymarket(raw: PolymarketMarket) -> dict | None:
     """
     Transform raw Polymarket API response into the shared Market schema.
     TODO: Map Polymarket's outcome tokens to yes_price.
           Polymarket returns token prices as strings ("0.62"), not floats.
     """
     try:
+        # outcomePrices arrives as a JSON string ('["0.62", "0.38"]'), not a list
+        prices = raw.outcome_prices
+        if isinstance(prices, str):
+            prices = msgspec.json.decode(prices)
         return {
             "platform": "polymarket",
-            "external_id": raw.get("conditionId", raw.get("id", "")),
-            "title": raw.get("question", raw.get("title", "")),
-            "category": raw.get("category", ""),
-            "close_time": raw.get("endDate"),
-            "yes_price": float(raw.get("outcomePrices", ["0"])[0]),  # First outcome = YES
-            "volume": float(raw.get("volume", 0)),
-            "is_open": raw.get("active", False),
+            "external_id": raw.condition_id or str(raw.id or ""),
+            "title": raw.question or raw.title or "",
+            "category": raw.category,
+            "close_time": raw.end_date,
+            # First outcome = YES
+            "yes_price": float(prices[0]) if prices else 0.0,
+            "volume": float(raw.volume or 0),
+            "is_open": bool(raw.active),
         }
-    except (KeyError, TypeError, ValueError) as e:
+    except (msgspec.DecodeError, TypeError, ValueError) as e:
         log.warning(f"Failed to normalize Polymarket market: {e}")
         return None
 
 
-def upsert_market(normalized: dict):
+NORMALIZERS = {
+    "kalshi.markets": normalize_kalshi,
+    "polymarket.markets": normalize_polymarket,
+}
+
+
+def market_fingerprint(normalized: dict) -> int:
+    """Hash of the fields that change while a market is live."""
+    return hash((
+        normalized["yes_price"],
+        normalized["volume"],
+        normalized["is_open"],
+        normalized["close_time"],
+    ))
+
+
+def remember_written(fingerprints: dict[str, int]):
+    """Record fingerprints of markets just written; evict the least recently seen."""
+    for external_id, fingerprint in fingerprints.items():
+        _last_seen[external_id] = fingerprint
+        _last_seen.move_to_end(external_id)
+    while len(_last_seen) > LAST_SEEN_MAX:
+        _last_seen.popitem(last=False)
+
+
+def parse_timestamp(value) -> datetime | None:
+    """ISO-8601 string (e.g. "2025-07-30T14:00:00Z") → aware datetime, or None."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+async def _get_db_conn() -> asyncpg.Connection:
+    """Connect on first use (or after a dropped connection) and create the staging table."""
+    global _db_conn
+    if _db_conn is None or _db_conn.is_closed():
+        _db_conn = await asyncpg.connect(DATABASE_URL)
+        await _db_conn.execute(CREATE_STAGING_SQL)
+    return _db_conn
+
+
+async def _copy_and_merge(records: list[tuple]):
+    conn = await _get_db_conn()
+    async with conn.transaction():
+        await conn.copy_records_to_table("markets_staging", records=records, columns=STAGING_COLUMNS)
+        await conn.execute(MERGE_STAGING_SQL)
+
+
+def _reset_db_conn():
+    """Drop the current connection; the next write reconnects."""
+    global _db_conn
+    if _db_conn is not None:
+        _db_conn.terminate()
+    _db_conn = None
+
+
+def upsert_markets(rows: list[dict]) -> bool:
     """
-    Insert or update a market record in PostgreSQL.
-    TODO: Implement using asyncpg or SQLAlchemy.
-          Use ON CONFLICT (external_id) DO UPDATE SET ... for idempotent upserts.
+    Insert or update a batch of normalized markets in PostgreSQL.
+    Idempotent: re-delivered messages just overwrite the same rows.
+    Returns False if the batch couldn't be written and was skipped.
     """
-    log.debug(f"TODO upsert: {normalized['platform']} / {normalized['external_id']}")
+    # ON CONFLICT can't update the same row twice in one statement, so keep
+    # only the latest message per market within the batch.
+    latest = {}
+    for row in rows:
+        if not row["external_id"]:
+            continue
+        if len(row["external_id"]) > EXTERNAL_ID_MAX:
+            # Clipping would merge it with another market, so leave it out
+            log.warning(f"Skipping market with over-long external_id: {row['external_id'][:50]}...")
+            continue
+        latest[row["external_id"]] = row
+    records = [
+        (
+            PLATFORM_DB_NAMES[row["platform"]],
+            row["external_id"],
+            row["title"][:TITLE_MAX],
+            (row["category"] or "")[:CATEGORY_MAX] or None,
+            parse_timestamp(row["close_time"]),
+            row["yes_price"],
+            float(row["volume"] or 0),
+            bool(row["is_open"]),
+        )
+        for row in latest.values()
+    ]
+    if not records:
+        return True
+
+    # A dropped connection (or a row Postgres still rejects) would otherwise
+    # escape run() before the offset commit, and the same batch would be
+    # redelivered and crash the consumer on every restart. Reconnect and
+    # retry once, then log the batch and move on.
+    for attempt in (1, 2):
+        try:
+            _db_loop.run_until_complete(_copy_and_merge(records))
+            log.debug(f"Upserted {len(records)} markets")
+            return True
+        except (asyncpg.PostgresError, asyncpg.InterfaceError, OSError) as e:
+            log.warning(f"Upsert of {len(records)} markets failed (attempt {attempt}): {e!r}")
+            _reset_db_conn()
+    log.error(f"Skipping batch of {len(records)} markets: {[r[1] for r in records]}")
+    return False
+
+
+def close_db():
+    if _db_conn is not None and not _db_conn.is_closed():
+        _db_loop.run_until_complete(_db_conn.close())
+    _db_loop.close()
 
 
 def run():
@@ -142,50 +367,68 @@ def run():
 
     try:
         while running:
-            # poll() blocks for up to 1 second waiting for a message.
-            # Returns None if no message arrived within the timeout.
-            msg = consumer.poll(timeout=1.0)
-
-            if msg is None:
-                continue  # No message this poll cycle
-
-            if msg.error():
-                # PARTITION_EOF is normal — it just means we've caught up
-                # to the end of a partition. Not an actual error.
-                if msg.error().code() == KafkaError._PARTITION_EOF:
-                    log.debug(f"End of partition: {msg.topic()} [{msg.partition()}]")
-                else:
-                    raise KafkaException(msg.error())
-                continue
-
-            # Determine which platform this message came from by topic name
-            topic = msg.topic()
-            try:
-                raw = json.loads(msg.value().decode("utf-8"))
-            except (json.JSONDecodeError, UnicodeDecodeError) as e:
-                log.error(f"Failed to decode message from {topic}: {e}")
-                consumer.commit(message=msg)  # Skip bad messages
-                continue
-
-            # Normalize and write to DB
-            if topic == "kalshi.markets":
-                normalized = normalize_kalshi(raw)
-            elif topic == "polymarket.markets":
-                normalized = normalize_polymarket(raw)
-            else:
-                normalized = None
-
-            if normalized:
-                upsert_market(normalized)
-
-            # Commit the offset AFTER successful processing.
-            # This guarantees we won't lose the message if we crash before writing.
-            consumer.commit(message=msg)
+            # consume() blocks for up to CONSUME_TIMEOUT and returns up to BATCH_SIZE
+            # messages. Returns an empty list if nothing arrived in that time.
+            msgs = consumer.consume(num_messages=BATCH_SIZE, timeout=CONSUME_TIMEOUT)
+
+            if not msgs:
+                continue  # No messages this poll cycle
+
+            rows = []
+            fingerprints = {}
+            for msg in msgs:
+                if msg.error():
+                    # PARTITION_EOF is normal — it just means we've caught up
+                    # to the end of a partition. Not an actual error.
+                    if msg.error().code() == KafkaError._PARTITION_EOF:
+                        log.debug(f"End of partition: {msg.topic()} [{msg.partition()}]")
+                    else:
+                        raise KafkaException(msg.error())
+                    continue
+
+                # Determine which platform this message came from by topic name
+                topic = msg.topic()
+                decoder = DECODERS.get(topic)
+                if decoder is None:
+                    continue
+                try:
+                    raw = decoder.decode(msg.value())
+                except msgspec.DecodeError as e:
+                    # Covers malformed JSON and schema mismatches (ValidationError)
+                    log.error(f"Failed to decode message from {topic}: {e}")
+                    continue  # Skip bad messages — committed with the batch
+
+                normalized = NORMALIZERS[topic](raw)
+                if not normalized:
+                    continue
+
+                external_id = normalized["external_id"]
+                fingerprint = market_fingerprint(normalized)
+                if _last_seen.get(external_id) == fingerprint:
+                    # Unchanged since we last wrote it — nothing to do, but
+                    # mark it recently seen so steady markets aren't evicted
+                    _last_seen.move_to_end(external_id)
+                    continue
+                rows.append(normalized)
+                fingerprints[external_id] = fingerprint
+
+            # Write the whole batch to the DB in one COPY + merge. Fingerprints
+            # are only remembered once the write succeeded, so a skipped batch's
+            # markets are written again the next time they're published.
+            if upsert_markets(rows):
+                remember_written(fingerprints)
+
+            # Commit offsets AFTER successful processing, once per batch.
+            # Kafka stores the highest consumed offset per partition, so one
+            # synchronous commit covers every message above. If we crash before
+            # this, the batch is re-delivered on restart (at-least-once).
+            consumer.commit(asynchronous=False)
 
     finally:
         # Always close the consumer on exit — this releases partition assignments
         # back to Kafka so other consumers in the group can take them over.
         consumer.close()
+        close_db()
         log.info("Markets consumer closed cleanly.")
 
 
@@ -0,0 +1,256 @@
+"""
+kafka/producers/common.py — Producer settings shared by every producer, and the
+publishing loop shared by the market producers.
+
+The Kalshi and Polymarket producers differ only in where they fetch markets
+from and which field identifies a market. Everything else lives here:
+
+  1. A background thread calls the platform's fetch function every poll
+     interval and hands each result to the main thread through a small queue,
+     so a slow API call and a slow broker never hold each other up
+  2. The main thread serializes each market to JSON and publishes it to the
+     platform's topic, keyed by the market's id, skipping markets that
+     haven't changed since their last confirmed delivery
+"""
+
+import logging
+import queue
+import threading
+from collections.abc import Callable
+from functools import partial
+
+import httpx
+import orjson
+from confluent_kafka import KafkaException, Producer
+
+log = logging.getLogger(__name__)
+
+# librdkafka settings merged into every producer's config.
+PRODUCER_TUNING = {
+    # "all": the broker waits for every in-sync replica before acknowledging
+    # (highest durability, and required by idempotence)
+    "acks": "all",
+    # Throughput: wait up to 50ms so a whole poll cycle's messages share
+    # one batch, and zstd-compress it (the JSON payloads are very repetitive).
+    "linger.ms": 50,
+    "batch.size": 1_000_000,   # librdkafka caps batches at message.max.bytes (1 MB default)
+    "compression.type": "zstd",
+    "compression.level": 3,
+    "queue.buffering.max.messages": 200_000,
+    "queue.buffering.max.kbytes": 1_048_576,
+    # Idempotence: broker de-duplicates retried sends, so retries can't
+    # create duplicate messages or reorder them within a partition.
+    "enable.idempotence": True,
+    # murmur2 key hashing, same as the Java client's default partitioner, so
+    # a key (market id, article URL) lands on the same partition whichever
+    # client produced it. Keyless messages are spread randomly.
+    "partitioner": "murmur2_random",
+}
+
+# Fetched-but-unpublished poll results allowed to queue up. Only grows if
+# publishing falls behind fetching; the fetch thread waits once it's full.
+FETCH_QUEUE_SIZE = 4
+
+# Every this many cycles, publish all markets even if unchanged, so quiet
+# markets still have a recent message within the topic's retention window.
+FULL_REPUBLISH_CYCLES = 60
+
+
+def _dumps(obj) -> bytes:
+    """
+    Serialize a message value. orjson returns bytes directly (no .encode step).
+
+    produce() takes these bytes as-is: librdkafka copies the payload into its
+    own queue before produce() returns, so the same bytes object can be kept
+    (MarketPublisher stores it as the last delivered payload) without any
+    further copy or wrapper.
+    """
+    return orjson.dumps(obj)
+
+
+# ─── Message keys ────────────────────────────────────────────────────────────
+# The same few hundred market ids come back every poll, so encode each id once
+# and reuse the bytes object instead of allocating a new one per message.
+# Cleared if it ever gets large so closed markets don't accumulate forever.
+KEY_CACHE_MAX = 50_000
+_key_cache: dict[str, bytes] = {}
+
+
+def encode_key(market_id: str) -> bytes:
+    key = _key_cache.get(market_id)
+    if key is None:
+        if len(_key_cache) >= KEY_CACHE_MAX:
+            _key_cache.clear()
+        key = _key_cache[market_id] = market_id.encode("utf-8")
+    return key
+
+
+def create_http_client() -> httpx.Client:
+    """
+    Long-lived HTTP client reused across poll cycles. HTTP/2 and a kept-alive
+    connection pool avoid a fresh TCP + TLS handshake on every request.
+    """
+    return httpx.Client(
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=50, keepalive_expiry=60),
+        timeout=httpx.Timeout(15.0, connect=5.0),
+        headers={"Accept-Encoding": "gzip"},
+    )
+
+
+# ─── Publishing ──────────────────────────────────────────────────────────────
+
+class MarketPublisher:
+    """
+    Publishes one platform's markets to its topic. market_key picks the id
+    used as the message key, so every message for a market lands on the same
+    partition (per-market ordering).
+    """
+
+    def __init__(self, producer: Producer, topic: str, market_key: Callable[[dict], str]):
+        self.producer   = producer
+        self.topic      = topic
+        self.market_key = market_key
+        # key → payload of the last message per market the broker confirmed.
+        # Written by delivery_report on success only, so a failed delivery
+        # doesn't make the market look already published — it's sent again
+        # next cycle. Most markets don't change between polls; re-publishing
+        # identical payloads only adds broker traffic and consumer work.
+        self.last_published: dict[bytes, bytes] = {}
+
+    def delivery_report(self, key: bytes, value: bytes, err, msg):
+        """
+        Callback invoked by the Kafka producer after each message is acknowledged
+        by the broker (success) or fails permanently (failure).
+
+        This runs asynchronously — you don't wait for it, Kafka calls it for you.
+        key and value are the objects passed to produce(), bound in with
+        partial: keeping those avoids the fresh copies msg.key()/msg.value()
+        would allocate for every delivery.
+        """
+        if err:
+            log.error(f"Delivery failed for key={key}: {err}")
+        else:
+            self.last_published[key] = value
+            log.debug(f"Delivered to {msg.topic()} partition={msg.partition()} offset={msg.offset()}")
+
+    def produce_with_backpressure(self, key: bytes, value: bytes):
+        """
+        produce() raises BufferError when librdkafka's local queue is full — the
+        broker is slow or unreachable. Serve delivery callbacks until there's
+        room, then retry, instead of letting the error crash the producer.
+        Messages the broker never takes time out (message.timeout.ms) and fail
+        through delivery_report, so this can't wait forever.
+        """
+        while True:
+            try:
+                self.producer.produce(
+                    topic=self.topic, key=key, value=value,
+                    on_delivery=partial(self.delivery_report, key, value),
+                )
+                return
+            except BufferError:
+                log.warning(f"Producer queue full ({len(self.producer)} messages) — waiting for deliveries...")
+                self.producer.poll(1.0)
+
+    def publish_markets(self, markets: list[dict], republish_all: bool = False):
+        """
+        Queue every market that changed since its last confirmed delivery (or
+        every market, if republish_all) and forget markets that have closed.
+        Each market is still serialized every cycle — the fresh bytes are what
+        the change check compares — but unchanged ones are never produced.
+        """
+        current = set()
+        for market in markets:
+            key = encode_key(self.market_key(market))
+            value = _dumps(market)
+            current.add(key)
+            if not republish_all and self.last_published.get(key) == value:
+                continue  # Unchanged since last confirmed delivery
+
+            self.produce_with_backpressure(key, value)
+
+        # Closed markets stop showing up; drop them so the map doesn't grow forever
+        for key in self.last_published.keys() - current:
+            del self.last_published[key]
+
+
+# ─── Main loop ───────────────────────────────────────────────────────────────
+
+def fetch_loop(
+    source: str,
+    fetch_markets: Callable[[httpx.Client], list[dict]],
+    poll_interval: int,
+    client: httpx.Client,
+    batches: queue.Queue,
+    stop: threading.Event,
+):
+    """
+    Background thread: fetch markets every poll_interval seconds and hand each
+    result to the publishing loop. Fetching on its own thread means a slow
+    broker never delays the next fetch, and a slow API never stalls delivery.
+    """
+    while not stop.is_set():
+        try:
+            markets = fetch_markets(client)
+            log.info(f"Fetched {len(markets)} markets from {source}")
+            # Blocks if the publishing loop has fallen FETCH_QUEUE_SIZE cycles behind
+            batches.put(markets)
+        except httpx.HTTPStatusError as e:
+            log.error(f"{source} API error: {e.response.status_code} — {e.response.text}")
+        except Exception as e:
+            log.exception(f"Unexpected fetch error: {e}")
+
+        stop.wait(poll_interval)
+
+
+def run_market_producer(
+    producer: Producer,
+    source: str,
+    topic: str,
+    fetch_markets: Callable[[httpx.Client], list[dict]],
+    market_key: Callable[[dict], str],
+    poll_interval: int,
+):
+    """Main loop: publish whatever the fetch thread hands over. Runs until interrupted."""
+    publisher = MarketPublisher(producer, topic, market_key)
+    log.info(f"{source} producer started. Polling every {poll_interval}s → topic: {topic}")
+
+    cycle = 0
+    batches: queue.Queue[list[dict]] = queue.Queue(maxsize=FETCH_QUEUE_SIZE)
+    stop = threading.Event()
+
+    with create_http_client() as client:
+        fetcher = threading.Thread(
+            target=fetch_loop,
+            args=(source, fetch_markets, poll_interval, client, batches, stop),
+            name=f"{source.lower()}-fetch",
+            daemon=True,
+        )
+        fetcher.start()
+        try:
+            while True:
+                try:
+                    markets = batches.get(timeout=1.0)
+                except queue.Empty:
+                    # Nothing new — still serve delivery callbacks
+                    producer.poll(0)
+                    continue
+
+                try:
+                    publisher.publish_markets(markets, republish_all=cycle % FULL_REPUBLISH_CYCLES == 0)
+                except KafkaException as e:
+                    log.error(f"Kafka error: {e}")
+                cycle += 1
+
+                # poll(0) runs delivery callbacks without waiting for acks.
+                # librdkafka delivers in the background, so there's no
+                # per-cycle flush() blocking the loop on broker round-trips.
+                producer.poll(0)
+        except KeyboardInterrupt:
+            log.info("Shutdown signal received — flushing queued messages...")
+        finally:
+            stop.set()
+            fetcher.join(timeout=5)
+            # Only flush on the way out, so nothing queued is lost
+            producer.flush(timeout=10)
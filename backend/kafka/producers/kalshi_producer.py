@@ -13,6 +13,9 @@ This script runs on a loop:
   3. Publish that JSON to the "kalshi.markets" Kafka topic
   4. Sleep for POLL_INTERVAL seconds, then repeat
 
+Steps 1–3 are shared with the Polymarket producer (kafka/producers/common.py);
+this file only knows how to fetch Kalshi markets and which field keys them.
+
 Run this script as a long-running process (or in Docker, or as a systemd service).
 It's completely independent from the FastAPI web server.
 
@@ -20,16 +23,15 @@ Usage:
     python -m kafka.producers.kalshi_producer
 """
 
-import json
 import logging
 import os
-import time
 
 import httpx
-from confluent_kafka import Producer, KafkaException
+from confluent_kafka import Producer
+
+from kafka.producers.common import PRODUCER_TUNING, run_market_producer
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [kalshi-producer] %(message)s")
-log = logging.getLogger(__name__)
 
 # ─── Config ──────────────────────────────────────────────────────────────────
 KAFKA_BOOTSTRAP_SERVERS = os.getenv("KAFKA_BOOTSTRAP_SERVERS", "localhost:29092")
@@ -42,32 +44,19 @@ POLL_INTERVAL_SECONDS   = int(os.getenv("KALSHI_POLL_INTERVAL", "60"))
 TOPIC = "kalshi.markets"
 
 
-def delivery_report(err, msg):
-    """
-    Callback invoked by the Kafka producer after each message is acknowledged
-    by the broker (success) or fails permanently (failure).
-
-    This runs asynchronously — you don't wait for it, Kafka calls it for you.
-    """
-    if err:
-        log.error(f"Delivery failed for key={msg.key()}: {err}")
-    else:
-        log.debug(f"Delivered to {msg.topic()} partition={msg.partition()} offset={msg.offset()}")
-
-
 def create_producer() -> Producer:
     """
     Create and return a Kafka Producer instance.
 
     bootstrap.servers: One or more Kafka broker addresses to connect to.
-    acks: "all" means the broker waits for all in-sync replicas to confirm
-          before acknowledging — highest durability. Use "1" for local dev speed.
+    Batching, compression and idempotence settings come from PRODUCER_TUNING
+    (kafka/producers/common.py), shared by every producer.
     """
     return Producer({
         "bootstrap.servers": KAFKA_BOOTSTRAP_SERVERS,
-        "acks": "all",
         "retries": 5,
         "retry.backoff.ms": 500,
+        **PRODUCER_TUNING,
     })
 
 
@@ -90,43 +79,18 @@ def fetch_kalshi_markets(client: httpx.Client) -> list[dict]:
     return data.get("markets", [])
 
 
+def market_key(market: dict) -> str:
+    # Use the market's external ticker as the Kafka message key.
+    # Kafka guarantees that messages with the same key go to the
+    # same partition — useful for ordering guarantees per market.
+    return market.get("ticker", "unknown")
+
+
 def run():
-    """Main polling loop. Runs indefinitely until interrupted."""
-    producer = create_producer()
-    log.info(f"Kalshi producer started. Polling every {POLL_INTERVAL_SECONDS}s → topic: {TOPIC}")
-
-    with httpx.Client() as client:
-        while True:
-            try:
-                markets = fetch_kalshi_markets(client)
-                log.info(f"Fetched {len(markets)} markets from Kalshi")
-
-                for market in markets:
-                    # Use the market's external ticker as the Kafka message key.
-                    # Kafka guarantees that messages with the same key go to the
-                    # same partition — useful for ordering guarantees per market.
-                    key = market.get("ticker", "unknown").encode("utf-8")
-                    value = json.dumps(market).encode("utf-8")
-
-                    producer.produce(
-                        topic=TOPIC,
-                        key=key,
-                        value=value,
-                        on_delivery=delivery_report,
-                    )
-
-                # producer.flush() waits until all queued messages are delivered.
-                # Call this periodically — not after every single message — for throughput.
-                producer.flush(timeout=10)
-
-            except httpx.HTTPStatusError as e:
-                log.error(f"Kalshi API error: {e.response.status_code} — {e.response.text}")
-            except KafkaException as e:
-                log.error(f"Kafka error: {e}")
-            except Exception as e:
-                log.exception(f"Unexpected error: {e}")
-
-            time.sleep(POLL_INTERVAL_SECONDS)
+    """Publish Kalshi markets until interrupted."""
+    run_market_producer(
+        create_producer(), "Kalshi", TOPIC, fetch_kalshi_markets, market_key, POLL_INTERVAL_SECONDS,
+    )
 
 
 if __name__ == "__main__":
@@ -8,6 +8,10 @@ web3-based platform. Key differences:
   - Prices are expressed per-outcome token (0.0 to 1.0)
   - Their REST CLOB API doesn't require authentication for reads
 
+The fetch/publish loop is shared with the Kalshi producer
+(kafka/producers/common.py); this file only knows how to fetch Polymarket
+markets and which field keys them.
+
 TODO: Polymarket also has a WebSocket stream for real-time order book updates.
       Consider switching from REST polling to WebSocket in V2 for lower latency.
 
@@ -15,16 +19,15 @@ Usage:
     python -m kafka.producers.polymarket_producer
 """
 
-import json
 import logging
 import os
-import time
 
 import httpx
-from confluent_kafka import KafkaException, Producer
+from confluent_kafka import Producer
+
+from kafka.producers.common import PRODUCER_TUNING, run_market_producer
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [polymarket-producer] %(message)s")
-log = logging.getLogger(__name__)
 
 KAFKA_BOOTSTRAP_SERVERS = os.getenv("KAFKA_BOOTSTRAP_SERVERS", "localhost:29092")
 POLYMARKET_CLOB_URL     = os.getenv("POLYMARKET_CLOB_URL", "https://clob.polymarket.com")
@@ -33,19 +36,12 @@ POLL_INTERVAL_SECONDS   = int(os.getenv("POLYMARKET_POLL_INTERVAL", "60"))
 TOPIC = "polymarket.markets"
 
 
-def delivery_report(err, msg):
-    if err:
-        log.error(f"Delivery failed for key={msg.key()}: {err}")
-    else:
-        log.debug(f"Delivered to {msg.topic()} partition={msg.partition()} offset={msg.offset()}")
-
-
 def create_producer() -> Producer:
     return Producer({
         "bootstrap.servers": KAFKA_BOOTSTRAP_SERVERS,
-        "acks": "all",
         "retries": 5,
         "retry.backoff.ms": 500,
+        **PRODUCER_TUNING,
     })
 
 
@@ -71,39 +67,16 @@ def fetch_polymarket_markets(client: httpx.Client) -> list[dict]:
     return data if isinstance(data, list) else data.get("markets", [])
 
 
+def market_key(market: dict) -> str:
+    # Polymarket uses "conditionId" or "id" as the market identifier
+    return str(market.get("conditionId", market.get("id", "unknown")))
+
+
 def run():
-    """Main polling loop."""
-    producer = create_producer()
-    log.info(f"Polymarket producer started. Polling every {POLL_INTERVAL_SECONDS}s → topic: {TOPIC}")
-
-    with httpx.Client() as client:
-        while True:
-            try:
-                markets = fetch_polymarket_markets(client)
-                log.info(f"Fetched {len(markets)} markets from Polymarket")
-
-                for market in markets:
-                    # Polymarket uses "conditionId" or "id" as the market identifier
-                    key = str(market.get("conditionId", market.get("id", "unknown"))).encode("utf-8")
-                    value = json.dumps(market).encode("utf-8")
-
-                    producer.produce(
-                        topic=TOPIC,
-                        key=key,
-                        value=value,
-                        on_delivery=delivery_report,
-                    )
-
-                producer.flush(timeout=10)
-
-            except httpx.HTTPStatusError as e:
-                log.error(f"Polymarket API error: {e.response.status_code} — {e.response.text}")
-            except KafkaException as e:
-                log.error(f"Kafka error: {e}")
-            except Exception as e:
-                log.exception(f"Unexpected error: {e}")
-
-            time.sleep(POLL_INTERVAL_SECONDS)
+    """Publish Polymarket markets until interrupted."""
+    run_market_producer(
+        create_producer(), "Polymarket", TOPIC, fetch_polymarket_markets, market_key, POLL_INTERVAL_SECONDS,
+    )
 
 
 if __name__ == "__main__":
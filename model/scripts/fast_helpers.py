@@ -0,0 +1,74 @@
+"""
+Pure helpers that scrapeAllCategories.py calls once per ticker or per candle.
+
+Kept in their own typed module so they can be compiled to a C extension
+with mypyc; the compiled module is picked up by the same import:
+
+    cd model/scripts && mypyc fast_helpers.py
+
+Delete the generated fast_helpers.*.so (or .pyd) and build/ to go back to
+plain Python.
+"""
+
+import re
+from datetime import datetime
+from typing import Any
+
+
+# First "-" followed by two digits starts the date suffix, e.g. KXBTC-25JAN31
+_DATE_SUFFIX_RE = re.compile(r"-\d\d")
+
+
+def extract_series_ticker(event_ticker: str) -> str:
+    """Strip trailing date suffix from event ticker to get series ticker."""
+    if not event_ticker:
+        return ""
+    if event_ticker[:2].isdigit():
+        # No series prefix at all — fall back to the first segment
+        return event_ticker.partition("-")[0]
+    m = _DATE_SUFFIX_RE.search(event_ticker)
+    return event_ticker[:m.start()] if m else event_ticker
+
+
+def to_float(value: Any) -> float | None:
+    """Decimal string or number → float, or None for missing/blank values."""
+    if value is None or value == "":
+        return None
+    return float(value)
+
+
+def to_unix(ts: Any) -> int | None:
+    """ISO string or int → unix timestamp int, or None."""
+    if ts is None:
+        return None
+    if isinstance(ts, (int, float)):
+        return int(ts)
+    try:
+        dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+        return int(dt.timestamp())
+    except Exception:
+        return None
+
+
+def category_slug(cat: str) -> str:
+    return cat.lower().replace(" ", "_").replace("/", "_")
+
+
+def candle_passes(c: dict[str, Any], max_spread: float) -> bool:
+    """True if candle has non-zero volume, non-null close price, and tight spread."""
+    # Runs once per candle, so: cheapest rejections first, one .get per key,
+    # and only the two close prices are ever converted to float.
+    volume = c.get("volume")
+    if not volume or not float(volume):
+        return False
+    price   = c.get("price")
+    yes_bid = c.get("yes_bid")
+    yes_ask = c.get("yes_ask")
+    if not (price and yes_bid and yes_ask):
+        return False
+    bid_close = yes_bid.get("close")
+    ask_close = yes_ask.get("close")
+    if bid_close is None or ask_close is None or price.get("close") is None:
+        return False
+    # Prices are decimal strings in 0-1 range (e.g. "0.04"); spread compared directly
+    return float(ask_close) - float(bid_close) <= max_spread
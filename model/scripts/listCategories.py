@@ -1,40 +1,71 @@
+import asyncio
 import csv
-import time
-import requests
+import json
+import os
+
+import httpx
+
+from fast_helpers import extract_series_ticker
 
 BASE_URL = "https://api.elections.kalshi.com/trade-api/v2"
 PAGE_SLEEP = 0.1
+RETRY_SLEEP = 30        # max backoff on 429 when no Retry-After is sent
+MAX_CONCURRENCY = 16    # in-flight requests; keeps us under Kalshi's rate limit
 OUTPUT_PATH = "data/categories.csv"
+SERIES_CACHE_PATH = "data/series_cache.json"
 
-_series_cache = {}
-_session = requests.Session()
+_series_cache = {}  # series ticker -> category (successful lookups only)
+_limit = asyncio.Semaphore(MAX_CONCURRENCY)
 
 
-def extract_series_ticker(event_ticker):
-    if not event_ticker:
-        return ""
-    parts = event_ticker.split("-")
-    series_parts = []
-    for part in parts:
-        if len(part) >= 2 and part[:2].isdigit():
-            break
-        series_parts.append(part)
-    return "-".join(series_parts) if series_parts else parts[0]
+def load_series_cache():
+    if not os.path.exists(SERIES_CACHE_PATH):
+        return
+    with open(SERIES_CACHE_PATH, encoding="utf-8") as f:
+        _series_cache.update(json.load(f))
+    print(f"Loaded {len(_series_cache)} cached series categories")
 
 
-def get_category(event_ticker):
-    series_ticker = extract_series_ticker(event_ticker)
-    if not series_ticker:
-        return "(none)"
-    if series_ticker in _series_cache:
-        return _series_cache[series_ticker]
+def save_series_cache():
+    with open(SERIES_CACHE_PATH, "w", encoding="utf-8") as f:
+        json.dump(_series_cache, f)
+
+
+async def get_with_retry(client, url, params=None):
+    backoff = 1
+    while True:
+        async with _limit:
+            resp = await client.get(url, params=params)
+        if resp.status_code != 429:
+            return resp
+        retry_after = resp.headers.get("Retry-After", "")
+        wait = float(retry_after) if retry_after.isdigit() else backoff
+        print(f"Rate limited on {url} — waiting {wait:.0f}s...")
+        await asyncio.sleep(wait)
+        backoff = min(backoff * 2, RETRY_SLEEP)
+
+
+async def fetch_category(client, series_ticker):
+    # None on failure, so the series isn't cached (or saved) and is retried later
     try:
-        resp = _session.get(f"{BASE_URL}/series/{series_ticker}", timeout=10)
-        cat = resp.json().get("series", {}).get("category", "(none)") if resp.status_code == 200 else "(none)"
+        resp = await get_with_retry(client, f"{BASE_URL}/series/{series_ticker}")
+        return resp.json().get("series", {}).get("category", "(none)") if resp.status_code == 200 else None
     except Exception:
-        cat = "(none)"
-    _series_cache[series_ticker] = cat
-    return cat
+        return None
+
+
+async def prefetch_categories(client, markets):
+    # Each unknown series is looked up once, all concurrently: one round-trip
+    # of latency per page instead of one per new series.
+    unknown = {extract_series_ticker(m.get("event_ticker", "")) for m in markets}
+    unknown -= _series_cache.keys() | {""}
+    tickers = list(unknown)
+    cats = await asyncio.gather(*(fetch_category(client, t) for t in tickers))
+    _series_cache.update((t, cat) for t, cat in zip(tickers, cats) if cat is not None)
+
+
+def get_category(event_ticker):
+    return _series_cache.get(extract_series_ticker(event_ticker), "(none)")
 
 
 def save(categories, page):
@@ -43,42 +74,55 @@ def save(categories, page):
     for cat, count in sorted_cats:
         print(f"  {count:>6}  {cat}")
     with open(OUTPUT_PATH, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=["category", "market_count"])
-        writer.writeheader()
-        for cat, count in sorted_cats:
-            writer.writerow({"category": cat, "market_count": count})
+        writer = csv.writer(f)
+        writer.writerow(["category", "market_count"])
+        writer.writerows(sorted_cats)
     print(f"  -> saved to {OUTPUT_PATH}")
 
 
-categories = {}
-cursor = None
-
-for page in range(1, 9999):
-    params = {"limit": 100}
-    if cursor:
-        params["cursor"] = cursor
-
-    resp = _session.get(f"{BASE_URL}/historical/markets", params=params, timeout=10)
-    if resp.status_code == 429:
-        print(f"Rate limited at page {page} — waiting 30s...")
-        time.sleep(30)
-        continue
-    resp.raise_for_status()
-    data = resp.json()
-    markets = data.get("markets", [])
-
-    if page % 10 == 0:
-        for m in markets:
-            cat = get_category(m.get("event_ticker", ""))
-            categories[cat] = categories.get(cat, 0) + 1
-
-    cursor = data.get("cursor")
-
-    if page % 20 == 0 or not cursor or not markets:
-        save(categories, page)
-
-    if not cursor or not markets:
-        print(f"Finished at page {page}")
-        break
-
-    time.sleep(PAGE_SLEEP)
+async def main():
+    load_series_cache()
+    categories = {}
+    cursor = None
+    page = 0
+
+    # HTTP/2 multiplexes the concurrent /series lookups and the page fetches
+    # over one connection instead of opening a pool of HTTP/1.1 sockets.
+    # Needs the h2 package: pip install "httpx[http2]"
+    limits = httpx.Limits(max_connections=MAX_CONCURRENCY * 2, max_keepalive_connections=16)
+    async with httpx.AsyncClient(http2=True, limits=limits, timeout=10) as client:
+        try:
+            for page in range(1, 9999):
+                params = {"limit": 100}
+                if cursor:
+                    params["cursor"] = cursor
+
+                resp = await get_with_retry(client, f"{BASE_URL}/historical/markets", params)
+                resp.raise_for_status()
+                data = resp.json()
+                markets = data.get("markets", [])
+
+                if page % 10 == 0:
+                    await prefetch_categories(client, markets)
+                    for m in markets:
+                        cat = get_category(m.get("event_ticker", ""))
+                        categories[cat] = categories.get(cat, 0) + 1
+
+                cursor = data.get("cursor")
+
+                if page % 20 == 0:
+                    print(f"Page {page}: {sum(categories.values())} markets categorized")
+
+                if not cursor or not markets:
+                    print(f"Finished at page {page}")
+                    break
+
+                await asyncio.sleep(PAGE_SLEEP)
+        finally:
+            # Written once here rather than every few pages — also runs on
+            # Ctrl-C (asyncio.run cancels main) and on errors.
+            save(categories, page)
+            save_series_cache()
+
+
+asyncio.run(main())